@@ -1,26 +1,69 @@
 import os
 import re
+import sys
+import json
+import time
+import argparse
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
+import hashlib
+import heapq
+import itertools
+import queue
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 import PyPDF2
 import pdfplumber
 
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+
+# --------------------------
+# 预编译的正则表达式（批量处理时在所有任务间共享）
+# --------------------------
+
+YEAR_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in [
+    r'\b(19[0-9]{2}|20[0-2][0-9])\b',
+    r'\((\d{4})\)',
+    r'\b(\d{4})\s*[,-]?\s*(?:January|February|March|April|May|June|July|August|September|October|November|December|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\b',
+    r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s*[,-]?\s*(\d{4})\b',
+]]
+PDF_DATE_PATTERN = re.compile(r'D:(\d{4})')
+TITLE_EXCLUDE_PATTERN = re.compile(r'abstract|introduction|references|page|\d{1,2}\s*$')
+NUMERIC_LINE_PATTERN = re.compile(r'^[0-9\s\.\-]*$')
+PAGE_NUMBER_PATTERN = re.compile(r'^\d{1,4}\s*$')
+ROMAN_NUMERAL_PATTERN = re.compile(r'^[ivxlc]+$', re.IGNORECASE)
+SINGLE_LETTER_PATTERN = re.compile(r'^[a-z]\s*$')
+ELLIPSIS_PATTERN = re.compile(r'\.{3,}')
+UPPERCASE_PATTERN = re.compile(r'[A-Z]')
+ILLEGAL_CHARS_PATTERN = re.compile(r'[<>:"/\\|?*]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+TEMPLATE_FIELD_PATTERN = re.compile(r'\{(\w+)\}')
+
 
 # --------------------------
 # PDF 智能提取函数（保持不变）
 # --------------------------
 
 def extract_year_from_text(text):
-    year_patterns = [
-        r'\b(19[0-9]{2}|20[0-2][0-9])\b',
-        r'\((\d{4})\)',
-        r'\b(\d{4})\s*[,-]?\s*(?:January|February|March|April|May|June|July|August|September|October|November|December|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\b',
-        r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s*[,-]?\s*(\d{4})\b',
-    ]
-    for pattern in year_patterns:
-        matches = re.findall(pattern, text, re.IGNORECASE)
+    for pattern in YEAR_PATTERNS:
+        matches = pattern.findall(text)
         if matches:
             for match in matches:
                 if isinstance(match, tuple):
@@ -40,7 +83,7 @@ def extract_year_from_pdf(pdf_path):
                 for field in ['/CreationDate', '/ModDate']:
                     if field in metadata:
                         date_str = metadata[field]
-                        year_match = re.search(r'D:(\d{4})', date_str)
+                        year_match = PDF_DATE_PATTERN.search(date_str)
                         if year_match:
                             year = year_match.group(1)
                             if 1900 <= int(year) <= 2030:
@@ -98,8 +141,8 @@ def extract_title_with_pdfplumber(pdf_path):
             potential_titles = []
             for i, line in enumerate(lines[:10]):
                 if (len(line) > 10 and len(line) < 200 and
-                        not re.search(r'abstract|introduction|references|page|\d{1,2}\s*$', line.lower()) and
-                        not re.search(r'^[0-9\s\.\-]*$', line)):
+                        not TITLE_EXCLUDE_PATTERN.search(line.lower()) and
+                        not NUMERIC_LINE_PATTERN.search(line)):
                     potential_titles.append((i, line))
             if potential_titles:
                 potential_titles.sort(key=lambda x: x[0])
@@ -109,6 +152,35 @@ def extract_title_with_pdfplumber(pdf_path):
     return None
 
 
+def guess_title_from_text(text):
+    # 智能识别与 OCR 共用的标题判断规则
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    excluded_keywords = [
+        'abstract', 'introduction', 'keywords', 'reference',
+        'journal', 'vol', 'volume', 'pp', 'page', 'doi',
+        'proceedings', 'conference', 'university', 'department'
+    ]
+    for i, line in enumerate(lines[:15]):
+        line_lower = line.lower()
+        if (len(line) < 10 or len(line) > 250 or
+                any(keyword in line_lower for keyword in excluded_keywords) or
+                PAGE_NUMBER_PATTERN.search(line) or
+                ROMAN_NUMERAL_PATTERN.search(line) or
+                SINGLE_LETTER_PATTERN.search(line) or
+                ELLIPSIS_PATTERN.search(line) or
+                line.count('.') > 5):
+            continue
+        if (UPPERCASE_PATTERN.search(line) and
+                line.count('.') <= 3 and
+                not line.endswith('.') and
+                not line.startswith('Received') and
+                not line.startswith('Copyright')):
+            if ',' in line and len(line.split(',')) <= 3:
+                continue
+            return line
+    return None
+
+
 def extract_title_advanced(pdf_path):
     try:
         with pdfplumber.open(pdf_path) as pdf:
@@ -116,30 +188,7 @@ def extract_title_advanced(pdf_path):
             text = first_page.extract_text()
             if not text:
                 return None
-            lines = [line.strip() for line in text.split('\n') if line.strip()]
-            excluded_keywords = [
-                'abstract', 'introduction', 'keywords', 'reference',
-                'journal', 'vol', 'volume', 'pp', 'page', 'doi',
-                'proceedings', 'conference', 'university', 'department'
-            ]
-            for i, line in enumerate(lines[:15]):
-                line_lower = line.lower()
-                if (len(line) < 10 or len(line) > 250 or
-                        any(keyword in line_lower for keyword in excluded_keywords) or
-                        re.search(r'^\d{1,4}\s*$', line) or
-                        re.search(r'^[ivxlc]+$', line, re.IGNORECASE) or
-                        re.search(r'^[a-z]\s*$', line) or
-                        re.search(r'\.{3,}', line) or
-                        line.count('.') > 5):
-                    continue
-                if (re.search(r'[A-Z]', line) and
-                        line.count('.') <= 3 and
-                        not line.endswith('.') and
-                        not line.startswith('Received') and
-                        not line.startswith('Copyright')):
-                    if ',' in line and len(line.split(',')) <= 3:
-                        continue
-                    return line
+            return guess_title_from_text(text)
     except Exception as e:
         pass
     return None
@@ -148,113 +197,757 @@ def extract_title_advanced(pdf_path):
 def sanitize_filename(title):
     if not title:
         return None
-    illegal_chars = r'[<>:"/\\|?*]'
-    title = re.sub(illegal_chars, '', title)
-    title = re.sub(r'\s+', ' ', title).strip()
+    title = ILLEGAL_CHARS_PATTERN.sub('', title)
+    title = WHITESPACE_PATTERN.sub(' ', title).strip()
     if len(title) > 120:
         title = title[:120] + "..."
     return title
 
 
+# --------------------------
+# 字段缓存：首次提取后保存在内存中，模板变化时只需重新计算文件名
+# --------------------------
+
+SUPPORTED_FIELDS = ('title', 'year')
+# 与模板无关、每个文件都会计算的字段
+FILE_FIELDS = ('sha256',)
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_field_cache = {}
+_field_cache_lock = threading.Lock()
+# 每个文件一把锁：同一文件的提取串行进行，后到的调用直接使用先完成的结果，避免重复提取
+_file_locks = {}
+
+
+def template_fields(format_template):
+    # 标题始终需要（无法提取标题的文件视为失败），其余字段只在模板引用时才提取
+    fields = {'title'}
+    for name in TEMPLATE_FIELD_PATTERN.findall(format_template):
+        if name in SUPPORTED_FIELDS:
+            fields.add(name)
+    return fields
+
+
+def missing_fields(cached, fields):
+    missing = {field for field in fields if field not in cached}
+    # 已确认无法提取标题的文件不再提取模板中的其他字段
+    if 'title' in cached and not cached['title']:
+        missing &= set(FILE_FIELDS)
+    return missing
+
+
+def file_content_hash(pdf_file):
+    digest = hashlib.sha256()
+    with open(pdf_file, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _file_cache_key(pdf_file):
+    stat = os.stat(pdf_file)
+    # 优先使用 inode 作为标识，文件重命名后缓存依然有效
+    identity = (stat.st_dev, stat.st_ino) if stat.st_ino else str(Path(pdf_file).resolve())
+    return identity, stat.st_size, stat.st_mtime_ns
+
+
+def update_cached_fields(pdf_file, updates):
+    key = _file_cache_key(pdf_file)
+    with _field_cache_lock:
+        fields = _field_cache.setdefault(key, {})
+        fields.update(updates)
+        return dict(fields)
+
+
+def get_cached_fields(pdf_file):
+    try:
+        key = _file_cache_key(pdf_file)
+    except OSError:
+        return {}
+    with _field_cache_lock:
+        return dict(_field_cache.get(key, {}))
+
+
+def _extract_title_field(pdf_file, log_callback=None):
+    methods = [
+        ("元数据提取", extract_title_with_pypdf2),
+        ("内容分析", extract_title_with_pdfplumber),
+        ("智能识别", extract_title_advanced)
+    ]
+
+    for method_name, method_func in methods:
+        title = method_func(pdf_file)
+        if title:
+            if log_callback:
+                log_callback(f"  {method_name}成功: {title[:80]}...")
+            clean_title = sanitize_filename(title)
+            if not clean_title and log_callback:
+                log_callback(f"  标题清理失败，跳过此文件")
+            return {'title': clean_title, 'title_method': method_name}
+        else:
+            if log_callback:
+                log_callback(f"  {method_name}失败")
+
+    if log_callback:
+        log_callback(f"  无法提取标题，跳过此文件")
+    return {'title': None, 'title_method': None}
+
+
+def _extract_year_field(pdf_file, log_callback=None):
+    year = extract_year_from_pdf(pdf_file)
+    if log_callback:
+        if year:
+            log_callback(f"  识别到年份: {year}")
+        else:
+            log_callback(f"  未识别到年份，使用'未知年份'")
+    return {'year': year}
+
+
+def _extract_hash_field(pdf_file, log_callback=None):
+    return {'sha256': file_content_hash(pdf_file)}
+
+
+# 按此顺序提取，保证先确定标题
+FIELD_EXTRACTORS = {
+    'title': _extract_title_field,
+    'year': _extract_year_field,
+    'sha256': _extract_hash_field,
+}
+
+
+def extract_pdf_fields(pdf_file, fields, log_callback=None):
+    key = _file_cache_key(pdf_file)
+    with _field_cache_lock:
+        file_lock = _file_locks.setdefault(key, threading.Lock())
+    with file_lock:
+        return _extract_pdf_fields_locked(pdf_file, key, fields, log_callback)
+
+
+def _extract_pdf_fields_locked(pdf_file, key, fields, log_callback):
+    with _field_cache_lock:
+        cached = dict(_field_cache.get(key, {}))
+
+    missing = missing_fields(cached, fields)
+    if log_callback and not missing - set(FILE_FIELDS):
+        log_callback(f"  使用已缓存的提取结果")
+        if not cached.get('title'):
+            log_callback(f"  无法提取标题，跳过此文件")
+    if not missing:
+        return cached
+
+    extracted = {}
+    for field in FIELD_EXTRACTORS:
+        if field in missing_fields({**cached, **extracted}, fields):
+            extracted.update(FIELD_EXTRACTORS[field](pdf_file, log_callback))
+
+    with _field_cache_lock:
+        _field_cache.setdefault(key, {}).update(extracted)
+    cached.update(extracted)
+    return cached
+
+
+def format_filename(format_template, fields):
+    if not fields.get('title'):
+        return None
+    year = fields.get('year') or "未知年份"
+    return format_template.replace('{year}', year).replace('{title}', fields['title'])
+
+
+def plan_target_names(folder, pdf_files, format_template, fields_by_file, existing_names=None):
+    # 只使用内存中的字段计算新文件名并处理重名，不读取 PDF 内容
+    # 按不区分大小写比较，避免在 Windows/macOS 上覆盖仅大小写不同的文件
+    if existing_names is None:
+        existing_names = os.listdir(folder)
+    taken = {name.casefold() for name in existing_names}
+    plan = []
+    for pdf_file in pdf_files:
+        new_filename = format_filename(format_template, fields_by_file.get(pdf_file, {}))
+        if new_filename is None:
+            plan.append((pdf_file, None))
+            continue
+
+        name_part, ext = os.path.splitext(new_filename)
+        counter = 1
+        while new_filename.casefold() in taken and new_filename.casefold() != pdf_file.name.casefold():
+            new_filename = f"{name_part}_{counter}{ext}"
+            counter += 1
+        taken.add(new_filename.casefold())
+        plan.append((pdf_file, new_filename))
+    return plan
+
+
+# --------------------------
+# 提取调度器：小文件优先，界面中可见的文件优先
+# --------------------------
+
+# 每页按 64KB 计入估算成本
+PAGE_COST_BYTES = 64 * 1024
+TRAILER_READ_BYTES = 64 * 1024
+PAGE_COUNT_PATTERN = re.compile(rb'/Count\s+(\d+)')
+
+PRIORITY_VISIBLE = 0
+PRIORITY_NORMAL = 1
+
+
+def read_page_count_hint(pdf_file):
+    # 只读取文件末尾（页面树根节点通常在此附近），读不到时返回 0
+    try:
+        with open(pdf_file, 'rb') as file:
+            file.seek(0, os.SEEK_END)
+            file.seek(max(0, file.tell() - TRAILER_READ_BYTES))
+            tail = file.read()
+    except OSError:
+        return 0
+    counts = [int(match) for match in PAGE_COUNT_PATTERN.findall(tail)]
+    return max(counts) if counts else 0
+
+
+def estimate_pdf_cost(pdf_file):
+    try:
+        size = os.path.getsize(pdf_file)
+    except OSError:
+        return 0
+    return size + read_page_count_hint(pdf_file) * PAGE_COST_BYTES
+
+
+class ExtractionScheduler:
+    def __init__(self, max_workers=None):
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("提取工作线程数必须大于 0")
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._heap = []
+        self._jobs = {}
+        self._visible = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._estimating = 0
+        self._shutdown = False
+
+    def submit(self, pdf_file, fields, callback):
+        self.submit_many([pdf_file], fields, callback)
+
+    def submit_many(self, pdf_files, fields, callback):
+        # callback(pdf_file, fields, log_lines, error, elapsed) 在工作线程中调用
+        # 成本估算需要读取文件，放在后台线程中完成，调用方（如界面线程）不会被阻塞
+        jobs = [{
+            'pdf_file': pdf_file,
+            'fields': fields,
+            'callback': callback,
+            'cost': None,
+            'state': 'estimating',
+        } for pdf_file in pdf_files]
+        with self._cond:
+            for job in jobs:
+                job['priority'] = PRIORITY_VISIBLE if job['pdf_file'] in self._visible else PRIORITY_NORMAL
+                self._jobs.setdefault(job['pdf_file'], []).append(job)
+            self._estimating += 1
+            self._start_workers()
+        threading.Thread(target=self._estimate_and_enqueue, args=(jobs,), daemon=True).start()
+
+    def prioritize(self, pdf_files):
+        # 记录当前可见的文件并调整排队中任务的优先级，旧的堆条目在出队时被忽略
+        with self._cond:
+            self._visible = set(pdf_files)
+            for pdf_file, jobs in self._jobs.items():
+                priority = PRIORITY_VISIBLE if pdf_file in self._visible else PRIORITY_NORMAL
+                for job in jobs:
+                    if job['state'] in ('estimating', 'queued') and job['priority'] != priority:
+                        job['priority'] = priority
+                        if job['state'] == 'queued':
+                            self._push(job)
+
+    def shutdown(self, wait=True):
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _push(self, job):
+        heapq.heappush(self._heap, (job['priority'], job['cost'], next(self._seq), job))
+
+    def _estimate_and_enqueue(self, jobs):
+        # 先估算这一批的全部成本再一次性入队，避免排在前面的大文件抢先开始
+        costs = [estimate_pdf_cost(job['pdf_file']) for job in jobs]
+        with self._cond:
+            for job, cost in zip(jobs, costs):
+                job['cost'] = cost
+                job['state'] = 'queued'
+                self._push(job)
+            self._estimating -= 1
+            self._cond.notify_all()
+
+    def _start_workers(self):
+        # 补足因异常退出的工作线程
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(target=self._worker, daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                while self._heap:
+                    priority, cost, seq, job = heapq.heappop(self._heap)
+                    if job['state'] == 'queued' and job['priority'] == priority:
+                        job['state'] = 'running'
+                        return job
+                if self._shutdown and not self._estimating:
+                    return None
+                self._cond.wait()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            log_lines = []
+            error = None
+            start = time.perf_counter()
+            try:
+                fields = extract_pdf_fields(job['pdf_file'], job['fields'], log_lines.append)
+            except Exception as e:
+                fields = {}
+                error = e
+
+            with self._cond:
+                job['state'] = 'done'
+                jobs = self._jobs.get(job['pdf_file'], [])
+                if job in jobs:
+                    jobs.remove(job)
+                if not jobs:
+                    self._jobs.pop(job['pdf_file'], None)
+            elapsed = time.perf_counter() - start
+            # 回调出错（例如界面已关闭）不能让工作线程退出
+            try:
+                job['callback'](job['pdf_file'], fields, log_lines, error, elapsed)
+            except Exception as e:
+                pass
+
+
+# --------------------------
+# OCR 识别：只处理三种方法都失败的扫描件，使用独立的进程池
+# --------------------------
+
+OCR_MAX_WORKERS = 2
+OCR_RESOLUTION = 150
+OCR_TOP_RATIO = 0.3
+OCR_LANG = "chi_sim+eng"
+
+# OCR 文本按文件内容哈希（及识别语言）缓存，文件改名或复制后仍可复用
+_ocr_cache = {}
+_ocr_cache_lock = threading.Lock()
+
+
+def ocr_first_page_top(pdf_path, resolution=OCR_RESOLUTION, lang=OCR_LANG):
+    # 在子进程中运行：标题通常位于第一页顶部，只识别这一区域
+    if pypdfium2 is not None:
+        # crop 为从左、下、右、上四边裁掉的宽度（单位 pt），渲染时只栅格化顶部区域
+        pdf = pypdfium2.PdfDocument(pdf_path)
+        try:
+            page = pdf[0]
+            bottom = page.get_height() * (1 - OCR_TOP_RATIO)
+            image = page.render(scale=resolution / 72, crop=(0, bottom, 0, 0)).to_pil()
+        finally:
+            pdf.close()
+    else:
+        # 旧版 pdfplumber 不依赖 pypdfium2：裁剪后的页面仍会整页栅格化，只是识别前截取顶部区域
+        with pdfplumber.open(pdf_path) as pdf:
+            page = pdf.pages[0]
+            top_region = page.crop((0, 0, page.width, page.height * OCR_TOP_RATIO))
+            image = top_region.to_image(resolution=resolution).original
+    return pytesseract.image_to_string(image, lang=lang)
+
+
+def needs_ocr(fields):
+    # 只有三种提取方法都没有找到标题的文件才进入 OCR
+    return 'title' in fields and not fields.get('title') and not fields.get('title_method')
+
+
+class OCRStage:
+    def __init__(self, max_workers=None, resolution=OCR_RESOLUTION, lang=OCR_LANG):
+        if max_workers is not None and max_workers < 1:
+            raise ValueError("OCR 进程数必须大于 0")
+        self.max_workers = max_workers or OCR_MAX_WORKERS
+        self.resolution = resolution
+        self.lang = lang or OCR_LANG
+        # available() 根据已安装的语言包确定实际使用的语言
+        self.active_lang = self.lang
+        self.missing_langs = []
+        self._executor = None
+        self._available = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        if self._available is None:
+            if pytesseract is None:
+                self._available = False
+                return False
+            try:
+                pytesseract.get_tesseract_version()
+                self._available = True
+            except Exception:
+                self._available = False
+                return False
+            self._resolve_languages()
+        return self._available
+
+    def _resolve_languages(self):
+        # Tesseract 缺少任意一个请求的语言包时整个调用都会失败，只保留已安装的语言，必要时退回 eng
+        try:
+            installed = set(pytesseract.get_languages(config=''))
+        except Exception:
+            return
+        requested = [lang for lang in self.lang.split('+') if lang]
+        usable = [lang for lang in requested if lang in installed]
+        self.missing_langs = [lang for lang in requested if lang not in installed]
+        if not usable and 'eng' in installed:
+            usable = ['eng']
+        if usable:
+            self.active_lang = '+'.join(usable)
+        else:
+            self._available = False
+
+    def submit(self, pdf_file, digest=None):
+        digest = digest or file_content_hash(pdf_file)
+        with _ocr_cache_lock:
+            text = _ocr_cache.get((digest, self.active_lang))
+        if text is not None:
+            future = Future()
+            future.set_result(text)
+            return future
+
+        with self._lock:
+            if self._executor is None:
+                # 此时提取线程仍在运行，使用 spawn 避免 fork 多线程进程时继承到被占用的锁
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            executor = self._executor
+        try:
+            future = executor.submit(ocr_first_page_top, str(pdf_file), self.resolution, self.active_lang)
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+        future.add_done_callback(lambda done: self._store((digest, self.active_lang), executor, done))
+        return future
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _discard_executor(self, executor):
+        # 子进程异常退出（如崩溃、被系统杀掉）后进程池不可再用，丢弃后下次提交时重新创建
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _store(self, cache_key, executor, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            with _ocr_cache_lock:
+                _ocr_cache[cache_key] = future.result()
+        elif isinstance(error, BrokenProcessPool):
+            self._discard_executor(executor)
+
+
+def apply_ocr_result(pdf_file, future, fields, log_callback=None):
+    try:
+        text = future.result()
+    except Exception as e:
+        if log_callback:
+            log_callback(f"  OCR识别失败: {e}")
+        return get_cached_fields(pdf_file)
+
+    title = sanitize_filename(guess_title_from_text(text)) if text else None
+    if not title:
+        if log_callback:
+            log_callback(f"  OCR识别失败")
+        return get_cached_fields(pdf_file)
+
+    if log_callback:
+        log_callback(f"  OCR识别成功: {title[:80]}...")
+    updates = {'title': title, 'title_method': "OCR识别"}
+    if 'year' in fields:
+        updates['year'] = extract_year_from_text(text) or extract_year_from_pdf(pdf_file)
+        if log_callback:
+            if updates['year']:
+                log_callback(f"  识别到年份: {updates['year']}")
+            else:
+                log_callback(f"  未识别到年份，使用'未知年份'")
+    return update_cached_fields(pdf_file, updates)
+
+
+# --------------------------
+# 机器可读的结果流（JSONL）：每个文件提取完成时写一条 extract 记录，
+# 确定新文件名并完成（预览）重命名后写一条 file 记录，最后一条为汇总
+# --------------------------
+
+EXIT_OK = 0
+EXIT_FAILURES = 1
+EXIT_NO_FILES = 3
+
+RESULTS_BUFFER_SIZE = 64 * 1024
+RESULTS_FLUSH_INTERVAL = 16
+RESULTS_FLUSH_SECONDS = 0.5
+
+
+class ResultsWriter:
+    # 使用缓冲 I/O 逐条写入，累计若干条或超过一定时间后刷新，下游工具可以边处理边读取
+    def __init__(self, results_path):
+        self._file = open(results_path, 'w', encoding='utf-8', buffering=RESULTS_BUFFER_SIZE)
+        self._unflushed = 0
+        self._last_flush = time.perf_counter()
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._unflushed += 1
+        if (self._unflushed >= RESULTS_FLUSH_INTERVAL or
+                time.perf_counter() - self._last_flush >= RESULTS_FLUSH_SECONDS):
+            self.flush()
+
+    def flush(self):
+        if self._unflushed:
+            self._file.flush()
+            self._unflushed = 0
+        self._last_flush = time.perf_counter()
+
+    def close(self):
+        self._file.close()
+
+
+def build_file_record(pdf_file, size, fields, status, target=None, timings=None, error=None, record_type='file'):
+    return {
+        'type': record_type,
+        'path': str(pdf_file),
+        'size': size,
+        'sha256': fields.get('sha256'),
+        'fields': {field: fields.get(field) for field in SUPPORTED_FIELDS},
+        'method': fields.get('title_method'),
+        'timings': {name: round(seconds * 1000, 1) for name, seconds in (timings or {}).items()},
+        'target': target,
+        'status': status,
+        'error': error,
+    }
+
+
 # --------------------------
 # 支持自定义格式的新重命名函数
 # --------------------------
 
-def rename_pdf_files_custom_format(folder_path, format_template="{title}.pdf", dry_run=True, log_callback=None, progress_callback=None):
+def build_summary(start, total, renamed=0, previewed=0, failed=0, exit_code=EXIT_OK, error=None):
+    return {
+        'total': total,
+        'renamed': renamed,
+        'previewed': previewed,
+        'failed': failed,
+        'elapsed': round(time.perf_counter() - start, 3),
+        'exit_code': exit_code,
+        'error': error,
+    }
+
+
+def rename_pdf_files_custom_format(folder_path, format_template="{title}.pdf", dry_run=True, log_callback=None, progress_callback=None,
+                                   scheduler=None, result_callback=None, ocr_stage=None, results_path=None):
+    # 第三个返回值为汇总信息（各项计数、用时和退出码），无论是否找到 PDF 文件
+    start = time.perf_counter()
+    results_writer = ResultsWriter(results_path) if results_path else None
+    try:
+        renamed_count, failed_files, summary = _rename_pdf_files(
+            folder_path, format_template, dry_run, log_callback, progress_callback,
+            scheduler, result_callback, ocr_stage, results_writer, start
+        )
+        if results_writer:
+            results_writer.write({'type': 'summary', **summary})
+        return renamed_count, failed_files, summary
+    except Exception as e:
+        # 出错时也写出汇总记录，下游工具可以据此判断本次运行失败
+        if results_writer:
+            results_writer.write({'type': 'summary',
+                                  **build_summary(start, 0, exit_code=EXIT_FAILURES, error=str(e))})
+        raise
+    finally:
+        if results_writer:
+            results_writer.close()
+
+
+def _rename_pdf_files(folder_path, format_template, dry_run, log_callback, progress_callback,
+                      scheduler, result_callback, ocr_stage, results_writer, start):
     folder = Path(folder_path)
     pdf_files = list(folder.glob("*.pdf"))
 
     if not pdf_files:
         if log_callback:
             log_callback("未找到PDF文件")
-        return 0, [], ["未找到PDF文件"]
+        return 0, [], build_summary(start, 0, exit_code=EXIT_NO_FILES, error="未找到PDF文件")
 
     if log_callback:
         log_callback(f"找到 {len(pdf_files)} 个PDF文件，使用格式模板: {format_template}")
 
     renamed_count = 0
+    previewed_count = 0
     failed_files = []
     total_files = len(pdf_files)
+    fields = template_fields(format_template)
+    fields_by_file = {}
+    timings_by_file = {pdf_file: {} for pdf_file in pdf_files}
+    sizes_by_file = {}
+    errors_by_file = {}
 
-    for idx, pdf_file in enumerate(pdf_files):
-        if progress_callback:
-            progress_callback(idx + 1, total_files, pdf_file.name)
-
+    if ocr_stage and not ocr_stage.available():
         if log_callback:
-            log_callback(f"\n处理文件: {pdf_file.name}")
-
-        title = None
-        methods = [
-            ("元数据提取", extract_title_with_pypdf2),
-            ("内容分析", extract_title_with_pdfplumber),
-            ("智能识别", extract_title_advanced)
-        ]
-
-        for method_name, method_func in methods:
-            title = method_func(pdf_file)
-            if title:
-                if log_callback:
-                    log_callback(f"  {method_name}成功: {title[:80]}...")
-                break
-            else:
-                if log_callback:
-                    log_callback(f"  {method_name}失败")
+            log_callback("未安装 pytesseract 或 Tesseract（或没有可用的语言包），跳过 OCR 识别")
+        ocr_stage = None
+    if ocr_stage and ocr_stage.missing_langs and log_callback:
+        log_callback(f"OCR 语言包未安装: {'+'.join(ocr_stage.missing_langs)}，改用: {ocr_stage.active_lang}")
 
-        if not title:
-            if log_callback:
-                log_callback(f"  无法提取标题，跳过此文件")
-            failed_files.append(pdf_file.name)
-            continue
+    # 输出结果流或启用 OCR（OCR 缓存按内容哈希索引）时，文件哈希也在工作线程中计算并缓存，
+    # 避免在收集线程里串行读取整个文件
+    extract_fields = fields | set(FILE_FIELDS) if (results_writer or ocr_stage) else fields
+    ocr_futures = {}
+    ocr_started = {}
 
-        clean_title = sanitize_filename(title)
-        if not clean_title:
-            if log_callback:
-                log_callback(f"  标题清理失败，跳过此文件")
-            failed_files.append(pdf_file.name)
-            continue
+    # 所有文件交给调度器，按完成顺序收集结果；未传入调度器时使用临时调度器
+    own_scheduler = scheduler is None
+    if own_scheduler:
+        scheduler = ExtractionScheduler()
+    results = queue.Queue()
+    scheduler.submit_many(pdf_files, extract_fields, lambda *result: results.put(result))
+
+    try:
+        collected = 0
+        while collected < total_files:
+            try:
+                pdf_file, file_fields, log_lines, error, elapsed = results.get(timeout=RESULTS_FLUSH_SECONDS)
+            except queue.Empty:
+                # 等待较慢的文件时，把已写入的记录及时刷新给下游
+                if results_writer:
+                    results_writer.flush()
+                continue
+            collected += 1
+            if progress_callback:
+                progress_callback(collected, total_files, pdf_file.name)
 
-        year = extract_year_from_pdf(pdf_file)
-        if year:
             if log_callback:
-                log_callback(f"  识别到年份: {year}")
-        else:
+                log_callback(f"\n处理文件: {pdf_file.name}")
+                for line in log_lines:
+                    log_callback(line)
+                if error:
+                    log_callback(f"  提取失败: {error}")
+
+            fields_by_file[pdf_file] = file_fields
+            timings_by_file[pdf_file]['extract'] = elapsed
+            if error:
+                errors_by_file[pdf_file] = str(error)
+            if result_callback:
+                result_callback(pdf_file, file_fields)
+
+            try:
+                sizes_by_file[pdf_file] = os.path.getsize(pdf_file)
+            except OSError:
+                sizes_by_file[pdf_file] = None
+            if results_writer:
+                status = 'error' if error else ('extracted' if file_fields.get('title') else 'failed')
+                results_writer.write(build_file_record(pdf_file, sizes_by_file[pdf_file], file_fields, status,
+                                                       timings=timings_by_file[pdf_file],
+                                                       error=errors_by_file.get(pdf_file), record_type='extract'))
+
+            # 提取失败的文件立即送入 OCR 进程池，与其余文件的提取同时进行
+            if ocr_stage and needs_ocr(file_fields):
+                try:
+                    ocr_started[pdf_file] = time.perf_counter()
+                    ocr_futures[pdf_file] = ocr_stage.submit(pdf_file, file_fields.get('sha256'))
+                except OSError as e:
+                    if log_callback:
+                        log_callback(f"  无法读取文件，跳过 OCR: {e}")
+                except BrokenProcessPool as e:
+                    if log_callback:
+                        log_callback(f"  OCR识别失败: {e}")
+    finally:
+        if own_scheduler:
+            scheduler.shutdown()
+
+    # 按完成顺序处理 OCR 结果，每完成一个立即写出记录
+    pending_ocr = {future: pdf_file for pdf_file, future in ocr_futures.items()}
+    while pending_ocr:
+        done, _ = wait(pending_ocr, timeout=RESULTS_FLUSH_SECONDS, return_when=FIRST_COMPLETED)
+        if not done and results_writer:
+            results_writer.flush()
+        for future in done:
+            pdf_file = pending_ocr.pop(future)
             if log_callback:
-                log_callback(f"  未识别到年份，使用'未知年份'")
-            year = "未知年份"
+                log_callback(f"\nOCR识别: {pdf_file.name}")
+            fields_by_file[pdf_file] = apply_ocr_result(pdf_file, future, fields, log_callback)
+            timings_by_file[pdf_file]['ocr'] = time.perf_counter() - ocr_started[pdf_file]
+            if result_callback:
+                result_callback(pdf_file, fields_by_file[pdf_file])
+            if results_writer:
+                status = 'extracted' if fields_by_file[pdf_file].get('title') else 'failed'
+                results_writer.write(build_file_record(pdf_file, sizes_by_file[pdf_file], fields_by_file[pdf_file],
+                                                       status, timings=timings_by_file[pdf_file], record_type='extract'))
 
-        # 替换占位符
-        new_filename = format_template.replace('{year}', year).replace('{title}', clean_title)
+    if log_callback:
+        log_callback("")
 
-        new_filepath = pdf_file.parent / new_filename
+    for pdf_file, new_filename in plan_target_names(folder, pdf_files, format_template, fields_by_file):
+        file_fields = fields_by_file[pdf_file]
+        timings = timings_by_file[pdf_file]
+        size = sizes_by_file[pdf_file]
 
-        counter = 1
-        original_new_filepath = new_filepath
-        while new_filepath.exists() and new_filepath != pdf_file:
-            name_part = os.path.splitext(new_filename)[0]
-            ext = os.path.splitext(new_filename)[1]
-            new_filename = f"{name_part}_{counter}{ext}"
-            new_filepath = pdf_file.parent / new_filename
-            counter += 1
+        if new_filename is None:
+            failed_files.append(pdf_file.name)
+            if results_writer:
+                results_writer.write(build_file_record(pdf_file, size, file_fields, 'failed', timings=timings,
+                                                       error=errors_by_file.get(pdf_file, "无法提取标题")))
+            continue
+
+        new_filepath = pdf_file.parent / new_filename
+        status = 'preview'
+        error = None
 
         if dry_run:
             if log_callback:
                 log_callback(f"  预览重命名: {pdf_file.name} -> {new_filename}")
+            previewed_count += 1
         else:
+            rename_start = time.perf_counter()
             try:
+                # 规划之后目录可能发生变化，重命名前再次确认不会覆盖其他文件
+                if new_filepath.exists() and not new_filepath.samefile(pdf_file):
+                    raise FileExistsError(f"目标文件已存在: {new_filename}")
                 pdf_file.rename(new_filepath)
                 if log_callback:
                     log_callback(f"  成功重命名: {new_filename}")
                 renamed_count += 1
+                status = 'renamed'
             except Exception as e:
                 if log_callback:
                     log_callback(f"  重命名失败: {e}")
                 failed_files.append(pdf_file.name)
+                status = 'error'
+                error = str(e)
+            timings['rename'] = time.perf_counter() - rename_start
+
+        if results_writer:
+            results_writer.write(build_file_record(pdf_file, size, file_fields, status, target=new_filename,
+                                                   timings=timings, error=error))
+
+    summary = build_summary(start, total_files, renamed_count, previewed_count, len(failed_files),
+                            EXIT_FAILURES if failed_files else EXIT_OK)
 
     if log_callback:
         log_callback(f"\n{'=' * 50}")
         log_callback(f"处理完成!")
         if dry_run:
-            log_callback(f"预览模式 - 将重命名 {renamed_count} 个文件")
+            log_callback(f"预览模式 - 将重命名 {previewed_count} 个文件")
         else:
             log_callback(f"成功重命名 {renamed_count} 个文件")
         if failed_files:
@@ -267,7 +960,194 @@ def rename_pdf_files_custom_format(folder_path, format_template="{title}.pdf", d
     if progress_callback:
         progress_callback(total_files, total_files, "完成")
     
-    return renamed_count, failed_files, None
+    return renamed_count, failed_files, summary
+
+
+# --------------------------
+# 批量任务清单模式：一个引擎依次处理多个文件夹
+# --------------------------
+
+JOB_DEFAULTS = {
+    'format_template': "{title}.pdf",
+    'dry_run': True,
+    'ocr': False,
+}
+
+# 清单中允许出现的键，拼错的键会被拒绝，而不是被悄悄忽略
+MANIFEST_KEYS = {'jobs', 'defaults', 'workers', 'ocr_workers', 'ocr_lang', 'report'}
+JOB_KEYS = {'folder', 'format_template', 'dry_run', 'ocr', 'results'}
+# results 不能作为默认值，否则所有任务会写入（并覆盖）同一个结果文件
+DEFAULT_KEYS = JOB_KEYS - {'folder', 'results'}
+
+
+def _check_keys(mapping, allowed, where):
+    unknown = sorted(str(key) for key in mapping if key not in allowed)
+    if unknown:
+        raise ValueError(f"{where}包含未知的键: {', '.join(unknown)}（可用: {', '.join(sorted(allowed))}）")
+
+
+def load_manifest(manifest_path):
+    path = Path(manifest_path)
+    with open(path, 'r', encoding='utf-8') as file:
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            if yaml is None:
+                raise ValueError("读取 YAML 清单需要安装 PyYAML（pip install pyyaml）")
+            try:
+                manifest = yaml.safe_load(file)
+            except yaml.YAMLError as e:
+                raise ValueError(f"YAML 解析失败: {e}")
+        else:
+            manifest = json.load(file)
+
+    # 允许清单直接是任务列表
+    if isinstance(manifest, list):
+        manifest = {'jobs': manifest}
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('jobs'), list):
+        raise ValueError("清单格式错误：需要包含 jobs 任务列表")
+    _check_keys(manifest, MANIFEST_KEYS, "清单")
+
+    defaults = manifest.get('defaults') or {}
+    if not isinstance(defaults, dict):
+        raise ValueError("清单格式错误：defaults 应为键值对象")
+    _check_keys(defaults, DEFAULT_KEYS, "清单的 defaults ")
+    for key in ('workers', 'ocr_workers'):
+        value = manifest.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value < 1):
+            raise ValueError(f"清单格式错误：{key} 应为正整数")
+    if manifest.get('ocr_lang') is not None and not isinstance(manifest['ocr_lang'], str):
+        raise ValueError("清单格式错误：ocr_lang 应为字符串，例如 chi_sim+eng")
+    if manifest.get('report') is not None and not isinstance(manifest['report'], str):
+        raise ValueError("清单格式错误：report 应为文件路径")
+
+    # 相对路径均相对于清单文件所在的目录
+    base_dir = path.parent
+    jobs = []
+    results_paths = {}
+    for index, entry in enumerate(manifest['jobs'], 1):
+        if isinstance(entry, str):
+            entry = {'folder': entry}
+        if not isinstance(entry, dict):
+            raise ValueError(f"清单中第 {index} 个任务格式错误：应为文件夹路径或键值对象")
+        _check_keys(entry, JOB_KEYS, f"清单中第 {index} 个任务")
+        job = {**JOB_DEFAULTS, **defaults, **entry}
+        if not job.get('folder') or not isinstance(job['folder'], str):
+            raise ValueError(f"清单中第 {index} 个任务缺少 folder")
+        if not isinstance(job['format_template'], str):
+            raise ValueError(f"清单中第 {index} 个任务的 format_template 应为字符串")
+        # 只接受真正的布尔值，避免字符串 "false" 被当作真
+        for key in ('dry_run', 'ocr'):
+            if not isinstance(job[key], bool):
+                raise ValueError(f"清单中第 {index} 个任务的 {key} 应为 true 或 false")
+        if job.get('results') is not None and not isinstance(job['results'], str):
+            raise ValueError(f"清单中第 {index} 个任务的 results 应为文件路径")
+        job['folder'] = str(base_dir / Path(job['folder']).expanduser())
+        if job.get('results'):
+            job['results'] = str(base_dir / Path(job['results']).expanduser())
+            resolved = os.path.normcase(os.path.abspath(job['results']))
+            if resolved in results_paths:
+                raise ValueError(f"清单中第 {index} 个任务的 results 与第 {results_paths[resolved]} 个任务相同")
+            results_paths[resolved] = index
+        jobs.append(job)
+    manifest['jobs'] = jobs
+
+    if manifest.get('report'):
+        manifest['report'] = str(base_dir / Path(manifest['report']).expanduser())
+    return manifest
+
+
+class BatchEngine:
+    # 所有任务共用同一个调度器（工作线程）、字段缓存和预编译的正则表达式
+    def __init__(self, max_workers=None, log_callback=None, ocr_workers=None, ocr_lang=None):
+        self.scheduler = ExtractionScheduler(max_workers)
+        self.ocr_stage = OCRStage(ocr_workers, lang=ocr_lang)
+        self.log_callback = log_callback
+
+    def log(self, message):
+        if self.log_callback:
+            self.log_callback(message)
+
+    def run_job(self, job):
+        start = time.perf_counter()
+        report = {
+            'folder': job['folder'],
+            'format_template': job['format_template'],
+            'dry_run': job['dry_run'],
+            'total': 0,
+            'renamed': 0,
+            'previewed': 0,
+            'failed_files': [],
+            'error': None,
+            'exit_code': EXIT_OK,
+        }
+
+        if not os.path.isdir(job['folder']):
+            report['error'] = "文件夹不存在"
+            report['exit_code'] = EXIT_NO_FILES
+            self.log(f"文件夹不存在: {job['folder']}")
+        else:
+            try:
+                renamed_count, failed_files, summary = rename_pdf_files_custom_format(
+                    folder_path=job['folder'],
+                    format_template=job['format_template'],
+                    dry_run=job['dry_run'],
+                    log_callback=self.log_callback,
+                    scheduler=self.scheduler,
+                    ocr_stage=self.ocr_stage if job['ocr'] else None,
+                    results_path=job.get('results')
+                )
+                report['total'] = summary['total']
+                report['renamed'] = renamed_count
+                report['previewed'] = summary['previewed']
+                report['failed_files'] = failed_files
+                report['error'] = summary['error']
+                report['exit_code'] = summary['exit_code']
+            except Exception as e:
+                report['error'] = str(e)
+                report['exit_code'] = EXIT_FAILURES
+                self.log(f"处理过程中发生错误: {str(e)}")
+
+        report['elapsed'] = round(time.perf_counter() - start, 3)
+        return report
+
+    def run_manifest(self, manifest):
+        start = time.perf_counter()
+        jobs = manifest['jobs']
+        job_reports = []
+        for index, job in enumerate(jobs, 1):
+            self.log(f"\n{'#' * 50}")
+            self.log(f"任务 {index}/{len(jobs)}: {job['folder']}")
+            job_reports.append(self.run_job(job))
+
+        summary = {
+            'jobs': len(job_reports),
+            'failed_jobs': sum(1 for report in job_reports if report['error']),
+            'total': sum(report['total'] for report in job_reports),
+            'renamed': sum(report['renamed'] for report in job_reports),
+            'previewed': sum(report['previewed'] for report in job_reports),
+            'failed': sum(len(report['failed_files']) for report in job_reports),
+            'elapsed': round(time.perf_counter() - start, 3),
+            'exit_code': max((report['exit_code'] for report in job_reports), default=EXIT_OK),
+        }
+
+        self.log(f"\n{'#' * 50}")
+        self.log(f"全部任务完成: {summary['jobs']} 个任务，{summary['failed_jobs']} 个任务出错")
+        for index, report in enumerate(job_reports, 1):
+            if report['error']:
+                status = f"出错: {report['error']}"
+            elif report['dry_run']:
+                status = f"{report['total']} 个文件，预览将重命名 {report['previewed']} 个，失败 {len(report['failed_files'])} 个"
+            else:
+                status = f"{report['total']} 个文件，重命名 {report['renamed']} 个，失败 {len(report['failed_files'])} 个"
+            self.log(f"  [{index}] {report['folder']} - {status}（{report['elapsed']} 秒）")
+        self.log(f"合计: {summary['total']} 个文件，重命名 {summary['renamed']} 个，"
+                 f"预览将重命名 {summary['previewed']} 个，失败 {summary['failed']} 个，"
+                 f"用时 {summary['elapsed']} 秒")
+
+        return {'jobs': job_reports, 'summary': summary}
+
+    def close(self):
+        self.scheduler.shutdown()
+        self.ocr_stage.shutdown()
 
 
 # --------------------------
@@ -278,7 +1158,7 @@ class PDFRenamerGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("文献PDF 智能重命名工具 - 自定义格式")
-        self.root.geometry("800x750")
+        self.root.geometry("800x900")
 
         # 主框架
         main_frame = ttk.Frame(root)
@@ -295,7 +1175,11 @@ class PDFRenamerGUI:
 
         # 模式：预览模式
         self.dry_run = tk.BooleanVar(value=True)
-        ttk.Checkbutton(main_frame, text="预览模式（不实际重命名，只显示结果）", variable=self.dry_run).pack(anchor=tk.W, pady=(0, 15))
+        ttk.Checkbutton(main_frame, text="预览模式（不实际重命名，只显示结果）", variable=self.dry_run).pack(anchor=tk.W, pady=(0, 5))
+
+        # 扫描件 OCR（可选）
+        self.enable_ocr = tk.BooleanVar(value=False)
+        ttk.Checkbutton(main_frame, text="对无文字层的扫描件启用 OCR 识别（需要安装 Tesseract）", variable=self.enable_ocr).pack(anchor=tk.W, pady=(0, 15))
 
         # 文件名格式模板选择
         ttk.Label(main_frame, text="文件名格式模板:").pack(anchor=tk.W, pady=(0, 5))
@@ -342,13 +1226,44 @@ class PDFRenamerGUI:
         self.progress_label = ttk.Label(progress_frame, text="准备就绪")
         self.progress_label.pack(anchor=tk.W, pady=(5, 0))
 
+        # 预览表：模板变化时根据已提取的字段即时更新
+        ttk.Label(main_frame, text="重命名预览:").pack(anchor=tk.W, pady=(10, 5))
+
+        preview_frame = ttk.Frame(main_frame)
+        preview_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.preview_tree = ttk.Treeview(preview_frame, columns=("original", "target"), show="headings", height=8)
+        self.preview_tree.heading("original", text="原文件名")
+        self.preview_tree.heading("target", text="新文件名")
+        self.preview_tree.column("original", width=360)
+        self.preview_tree.column("target", width=360)
+        preview_scrollbar = ttk.Scrollbar(preview_frame, orient="vertical", command=self.preview_tree.yview)
+        self.preview_tree.configure(yscrollcommand=lambda first, last: self.on_preview_scroll(preview_scrollbar, first, last))
+        self.preview_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        preview_scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+
+        # 预览状态：上一次处理的文件列表、目录中的文件名、各文件已提取的字段，以及后台提取任务的数量
+        # 模板变化时只使用这些内存中的数据，不访问文件系统
+        self.preview_folder = None
+        self.preview_files = []
+        self.preview_names = []
+        self.preview_fields = {}
+        # 读取出错的文件（可能只是暂时被占用），不记入 preview_fields，下次修改模板时重试
+        self.preview_errors = set()
+        self.background_pending = 0
+        self.running = False
+
+        # 整个界面共用一个调度器，滚动预览表时优先提取可见的文件
+        self.scheduler = ExtractionScheduler()
+        self.ocr_stage = OCRStage()
+
         # 日志显示区域
         ttk.Label(main_frame, text="运行日志:").pack(anchor=tk.W, pady=(10, 5))
         
         log_frame = ttk.Frame(main_frame)
         log_frame.pack(fill=tk.BOTH, expand=True)
         
-        self.log_text = scrolledtext.ScrolledText(log_frame, height=20)
+        self.log_text = scrolledtext.ScrolledText(log_frame, height=12)
         self.log_text.pack(fill=tk.BOTH, expand=True)
 
         # 开始处理按钮
@@ -360,6 +1275,7 @@ class PDFRenamerGUI:
 
         # 初始化界面
         self.on_format_type_change()
+        self.format_template.trace_add("write", self.on_template_change)
 
     def on_format_type_change(self):
         if self.use_preset_format.get():  # 使用预设
@@ -369,6 +1285,100 @@ class PDFRenamerGUI:
             self.format_combobox.pack_forget()
             self.custom_format_entry.pack(side=tk.LEFT, padx=(10, 5))
 
+    def on_template_change(self, *args):
+        self.preview_errors.clear()
+        self.refresh_preview()
+
+    def load_preview(self, folder):
+        # 只在载入文件夹时访问文件系统
+        self.preview_folder = folder
+        self.preview_files = list(Path(folder).glob("*.pdf"))
+        try:
+            self.preview_names = os.listdir(folder)
+        except OSError:
+            self.preview_names = []
+        self.preview_fields = {pdf_file: get_cached_fields(pdf_file) for pdf_file in self.preview_files}
+        self.preview_errors = set()
+        self.refresh_preview()
+
+    def refresh_preview(self):
+        if not self.preview_files:
+            return
+
+        fmt = self.format_template.get()
+        fields = template_fields(fmt)
+        pending = [pdf_file for pdf_file in self.preview_files
+                   if pdf_file not in self.preview_errors and missing_fields(self.preview_fields.get(pdf_file, {}), fields)]
+        plan = plan_target_names(self.preview_folder, self.preview_files, fmt, self.preview_fields,
+                                 existing_names=self.preview_names)
+
+        # 原地更新已有的行，保持滚动位置
+        existing_rows = set(self.preview_tree.get_children())
+        planned_rows = set()
+        pending_set = set(pending)
+        for pdf_file, new_filename in plan:
+            if pdf_file in self.preview_errors:
+                new_filename = "（读取失败）"
+            elif pdf_file in pending_set:
+                new_filename = "提取中..."
+            elif new_filename is None:
+                new_filename = "（无法提取标题）"
+            row_id = str(pdf_file)
+            planned_rows.add(row_id)
+            if row_id in existing_rows:
+                self.preview_tree.item(row_id, values=(pdf_file.name, new_filename))
+            else:
+                self.preview_tree.insert("", tk.END, iid=row_id, values=(pdf_file.name, new_filename))
+        stale_rows = existing_rows - planned_rows
+        if stale_rows:
+            self.preview_tree.delete(*stale_rows)
+
+        # 只有模板新引用的字段才需要额外提取，交给调度器在后台完成
+        if pending and not self.running and not self.background_pending:
+            self.background_pending = len(pending)
+            self.prioritize_visible_rows()
+            self.scheduler.submit_many(pending, fields, self.on_background_result)
+
+    def update_preview_row(self, pdf_file, fields):
+        # 单个文件提取完成后只更新该行，重名处理在全部完成后统一刷新
+        # 提取出错时字段为空，只标记为读取失败，不当作确定无法提取标题
+        if fields:
+            self.preview_fields[pdf_file] = fields
+            self.preview_errors.discard(pdf_file)
+            new_filename = format_filename(self.format_template.get(), fields) or "（无法提取标题）"
+        else:
+            self.preview_errors.add(pdf_file)
+            new_filename = "（读取失败）"
+        row_id = str(pdf_file)
+        if not self.preview_tree.exists(row_id):
+            return
+        self.preview_tree.item(row_id, values=(pdf_file.name, new_filename))
+
+    def on_background_result(self, pdf_file, fields, log_lines, error, elapsed):
+        if error:
+            fields = {}
+        self.root.after(0, self.on_background_result_ready, pdf_file, fields)
+
+    def on_background_result_ready(self, pdf_file, fields):
+        self.update_preview_row(pdf_file, fields)
+        self.background_pending -= 1
+        if not self.background_pending:
+            # 提取期间模板可能再次变化，刷新时会按最新模板检查是否还有缺失字段
+            self.refresh_preview()
+
+    def on_preview_scroll(self, scrollbar, first, last):
+        scrollbar.set(first, last)
+        self.prioritize_visible_rows()
+
+    def prioritize_visible_rows(self):
+        rows = self.preview_tree.get_children()
+        if not rows:
+            return
+        first, last = self.preview_tree.yview()
+        start = int(first * len(rows))
+        end = min(len(rows), int(last * len(rows)) + 1)
+        self.scheduler.prioritize([Path(row_id) for row_id in rows[start:end]])
+
     def browse_folder(self):
         folder_selected = filedialog.askdirectory()
         if folder_selected:
@@ -400,6 +1410,17 @@ class PDFRenamerGUI:
 
         # 禁用开始按钮，防止重复点击
         self.start_button.config(state="disabled")
+        self.running = True
+
+        # 先列出全部文件，提取结果到达后逐行更新
+        self.preview_tree.delete(*self.preview_tree.get_children())
+        self.preview_folder = folder
+        self.preview_files = list(Path(folder).glob("*.pdf"))
+        self.preview_names = os.listdir(folder)
+        self.preview_fields = {}
+        self.preview_errors = set()
+        for pdf_file in self.preview_files:
+            self.preview_tree.insert("", tk.END, iid=str(pdf_file), values=(pdf_file.name, "提取中..."))
         
         thread = threading.Thread(target=self.run_rename, args=(folder, fmt), daemon=True)
         thread.start()
@@ -411,20 +1432,28 @@ class PDFRenamerGUI:
                 format_template=fmt,
                 dry_run=self.dry_run.get(),
                 log_callback=self.log,
-                progress_callback=self.update_progress
+                progress_callback=self.update_progress,
+                scheduler=self.scheduler,
+                ocr_stage=self.ocr_stage if self.enable_ocr.get() else None,
+                result_callback=lambda pdf_file, fields: self.root.after(0, self.update_preview_row, pdf_file, fields)
             )
         except Exception as e:
             self.log(f"处理过程中发生错误: {str(e)}")
         finally:
-            # 重新启用开始按钮
-            self.root.after(0, lambda: self.start_button.config(state="normal"))
+            # 重新启用开始按钮，并用本次提取的字段刷新预览表
+            self.root.after(0, self.on_rename_finished, folder)
+
+    def on_rename_finished(self, folder):
+        self.running = False
+        self.start_button.config(state="normal")
+        self.load_preview(folder)
 
 
 # --------------------------
-# 启动 GUI
+# 启动 GUI / 命令行批量模式
 # --------------------------
 
-if __name__ == "__main__":
+def start_gui():
     root = tk.Tk()
     
     # 设置主题样式
@@ -435,4 +1464,56 @@ if __name__ == "__main__":
     style.configure("Accent.TButton", foreground="white", background="#007acc")
     
     app = PDFRenamerGUI(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"应为正整数: {value}")
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="文献PDF智能重命名工具")
+    parser.add_argument("--manifest", help="批量任务清单（JSON 或 YAML），不指定时启动图形界面")
+    parser.add_argument("--report", help="批量任务报告的输出路径（JSON），优先于清单中的 report")
+    parser.add_argument("--workers", type=positive_int, help="提取工作线程数")
+    parser.add_argument("--ocr-workers", type=positive_int, help="OCR 进程数（仅对启用 ocr 的任务生效）")
+    parser.add_argument("--ocr-lang", help=f"OCR 语言（Tesseract 语言代码，默认 {OCR_LANG}，未安装的语言会被跳过）")
+    args = parser.parse_args(argv)
+
+    if not args.manifest:
+        start_gui()
+        return 0
+
+    try:
+        manifest = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        parser.error(f"无法读取任务清单: {e}")
+
+    engine = BatchEngine(
+        max_workers=args.workers or manifest.get('workers'),
+        log_callback=print,
+        ocr_workers=args.ocr_workers or manifest.get('ocr_workers'),
+        ocr_lang=args.ocr_lang or manifest.get('ocr_lang')
+    )
+    try:
+        report = engine.run_manifest(manifest)
+    finally:
+        engine.close()
+
+    report_path = args.report or manifest.get('report')
+    if report_path:
+        with open(report_path, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f"任务报告已写入: {report_path}")
+
+    return report['summary']['exit_code']
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file